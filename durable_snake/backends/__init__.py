@@ -1,6 +1,7 @@
-from .base import BaseBackend
+from .base import BaseBackend, Page
 
 
 __all__ = [
-    "BaseBackend"
+    "BaseBackend",
+    "Page",
 ]
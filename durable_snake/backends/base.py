@@ -1,12 +1,43 @@
 import contextvars
-from typing import List
+from dataclasses import dataclass
+from typing import AsyncIterator, Generic, List, TypeVar
 
+from ..internal.activity_cache import ActivityCacheEntry
 from ..internal.workflow_event import WorkflowEvent
 from ..internal.workflow_lock import WorkflowLock
+from ..internal.workflow_signal import WorkflowSignal
 from ..workflow import WorkflowInstance
 
 backend_context = contextvars.ContextVar[dict | None]("backend", default=None)
 
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def _validate_page_size(page_size: int):
+    if page_size <= 0:
+        raise ValueError(f"page_size must be positive, got {page_size}")
+
+
+def _validate_single_page_cursor(cursor: str | None):
+    # Default page implementations return everything at once, so a cursor can only be a misuse
+    if cursor is not None:
+        raise ValueError(
+            "cursor passed to a single page listing, override the page method to paginate"
+        )
+
+
+@dataclass
+class Page(Generic[T]):
+    """
+    A single page of a paginated backend listing
+    """
+
+    items: List[T]
+    next_cursor: str | None = None
+    """Opaque cursor to pass back to get the next page, None if this is the last page"""
+
 
 class BaseBackend:
     """
@@ -31,6 +62,7 @@ class BaseBackend:
         Creates a new workflow instance.
 
         TODO: add optimization for poking a worker instead of waiting for a list_pending_workflows
+        (see iter_workflow_wakeups)
 
         :param workflow: A workflow that should be inserted if it does not exist (by ID).
         :returns: Workflow ID
@@ -45,6 +77,47 @@ class BaseBackend:
         """
         raise NotImplementedError
 
+    async def list_pending_workflows_page(
+            self,
+            queue: str,
+            cursor: str | None = None,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Page[WorkflowInstance]:
+        """
+        Lists a page of workflows that are pending to be picked up by a runner.
+        The default returns everything from list_pending_workflows as a single page, override this to
+        paginate in the backend. The default raises ValueError if given a cursor.
+
+        :param queue: Queue to list pending workflows for
+        :param cursor: Cursor from the previous page, None for the first page
+        :param page_size: Hint for how many items to return per page
+        :return: Page of workflows
+        """
+        _validate_single_page_cursor(cursor)
+        return Page(items=await self.list_pending_workflows(queue))
+
+    async def iter_pending_workflows(
+            self,
+            queue: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[WorkflowInstance]:
+        """
+        Streams workflows that are pending to be picked up by a runner, fetching a page at a time.
+        page_size is ignored unless the backend overrides the page method.
+
+        :param queue: Queue to list pending workflows for
+        :param page_size: Hint for how many items to fetch per page
+        """
+        _validate_page_size(page_size)
+        cursor = None
+        while True:
+            page = await self.list_pending_workflows_page(queue, cursor, page_size)
+            for workflow in page.items:
+                yield workflow
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
     async def get_workflow_instance(self, workflow_id: str) -> WorkflowInstance:
         """
         Gets a workflow instance by ID
@@ -94,7 +167,44 @@ class BaseBackend:
         :return: List of expired locks
         """
         raise NotImplementedError
-    
+
+    async def list_expired_locks_page(
+            self,
+            cursor: str | None = None,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Page[WorkflowLock]:
+        """
+        List a page of expired workflow locks that this runner can attempt to acquire.
+        The default returns everything from list_expired_locks as a single page, override this to
+        paginate in the backend. The default raises ValueError if given a cursor.
+
+        :param cursor: Cursor from the previous page, None for the first page
+        :param page_size: Hint for how many items to return per page
+        :return: Page of expired locks
+        """
+        _validate_single_page_cursor(cursor)
+        return Page(items=await self.list_expired_locks())
+
+    async def iter_expired_locks(
+            self,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[WorkflowLock]:
+        """
+        Streams expired workflow locks, fetching a page at a time.
+        page_size is ignored unless the backend overrides the page method.
+
+        :param page_size: Hint for how many items to fetch per page
+        """
+        _validate_page_size(page_size)
+        cursor = None
+        while True:
+            page = await self.list_expired_locks_page(cursor, page_size)
+            for lock in page.items:
+                yield lock
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
     async def list_locks_held_by_runner(self, runner_id: str) -> List[WorkflowLock]:
         """
         List workflow locks that are held by a runner
@@ -103,6 +213,48 @@ class BaseBackend:
         :return: List of locks
         """
         raise NotImplementedError
+
+    async def list_locks_held_by_runner_page(
+            self,
+            runner_id: str,
+            cursor: str | None = None,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Page[WorkflowLock]:
+        """
+        List a page of workflow locks that are held by a runner.
+        The default returns everything from list_locks_held_by_runner as a single page, override this to
+        paginate in the backend. The default raises ValueError if given a cursor.
+
+        :param runner_id: Runner ID
+        :param cursor: Cursor from the previous page, None for the first page
+        :param page_size: Hint for how many items to return per page
+        :return: Page of locks
+        """
+        _validate_single_page_cursor(cursor)
+        return Page(items=await self.list_locks_held_by_runner(runner_id))
+
+    async def iter_locks_held_by_runner(
+            self,
+            runner_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[WorkflowLock]:
+        """
+        Streams workflow locks that are held by a runner, fetching a page at a time.
+        page_size is ignored unless the backend overrides the page method.
+
+        :param runner_id: Runner ID
+        :param page_size: Hint for how many items to fetch per page
+        """
+        _validate_page_size(page_size)
+        cursor = None
+        while True:
+            page = await self.list_locks_held_by_runner_page(runner_id, cursor, page_size)
+            for lock in page.items:
+                yield lock
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
     async def insert_workflow_event_history(
             self,
             event: WorkflowEvent,
@@ -129,3 +281,136 @@ class BaseBackend:
         :return: List of workflow events
         """
         raise NotImplementedError
+
+    async def get_workflow_history_page(
+            self,
+            workflow_id: str,
+            cursor: str | None = None,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Page[WorkflowEvent]:
+        """
+        Get a page of a workflow's history in ascending sequence ID order.
+        The default returns everything from get_workflow_history as a single page, with the cursor passed as
+        after_seq. Override this to paginate in the backend, using the last returned sequence ID as the cursor.
+
+        :param workflow_id: Workflow ID to get the history for
+        :param cursor: Cursor from the previous page, None for the first page
+        :param page_size: Hint for how many items to return per page
+        :return: Page of workflow events
+        """
+        after_seq = int(cursor) if cursor is not None else None
+        return Page(items=await self.get_workflow_history(workflow_id, after_seq))
+
+    async def iter_workflow_history(
+            self,
+            workflow_id: str,
+            after_seq: int | None = None,
+            page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> AsyncIterator[WorkflowEvent]:
+        """
+        Streams a workflow's history in ascending sequence ID order, fetching a page at a time.
+        page_size is ignored unless the backend overrides the page method.
+
+        :param workflow_id: Workflow ID to get the history for
+        :param after_seq: If provided, only get the history after this sequence id
+        :param page_size: Hint for how many items to fetch per page
+        """
+        _validate_page_size(page_size)
+        cursor = str(after_seq) if after_seq is not None else None
+        while True:
+            page = await self.get_workflow_history_page(workflow_id, cursor, page_size)
+            for event in page.items:
+                yield event
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    async def insert_workflow_signals(self, signals: List[WorkflowSignal]):
+        """
+        Inserts signals into the workflows' signal inboxes, ideally in a single write.
+        If a signal has coalesce set, you must drop any pending signals for the same workflow and name,
+        so only the latest value is ever drained. Runners only coalesce within a single drained batch.
+
+        Inserting a signal should wake up the workflow by publishing its ID through iter_workflow_wakeups,
+        so runners can pick it up without waiting to poll.
+
+        :param signals: Signals to insert, possibly for many workflows
+        """
+        raise NotImplementedError
+
+    async def list_workflow_signals(
+            self,
+            workflow_id: str,
+            limit: int = DEFAULT_PAGE_SIZE,
+    ) -> List[WorkflowSignal]:
+        """
+        Lists the pending signals in a workflow's inbox in ascending creation order, without removing them.
+
+        :param workflow_id: Workflow ID
+        :param limit: Max number of signals to return
+        :return: List of signals
+        """
+        raise NotImplementedError
+
+    async def mark_workflow_signals_recording(
+            self,
+            workflow_id: str,
+            signal_ids: List[str],
+            sequence_id: int,
+            lock: WorkflowLock
+    ):
+        """
+        Sets recording_seq on signals in a workflow's inbox, right before they are recorded in the history
+        event with that sequence ID. If the signals are not deleted afterwards, runners check that one event
+        to know whether they were already recorded.
+
+        :param workflow_id: Workflow ID
+        :param signal_ids: IDs of the signals being recorded
+        :param sequence_id: Sequence ID of the history event they are being recorded in
+        :param lock: The currently held workflow lock you can use as a fencing token
+        """
+        raise NotImplementedError
+
+    async def delete_workflow_signals(
+            self,
+            workflow_id: str,
+            signal_ids: List[str],
+            lock: WorkflowLock
+    ):
+        """
+        Removes signals from a workflow's inbox once they have been recorded to the history.
+
+        :param workflow_id: Workflow ID
+        :param signal_ids: IDs of the signals to remove
+        :param lock: The currently held workflow lock you can use as a fencing token
+        """
+        raise NotImplementedError
+
+    async def iter_workflow_wakeups(self, queue: str) -> AsyncIterator[str]:
+        """
+        Streams the IDs of workflows on a queue that need to be woken up, e.g. because they were signaled.
+        The default yields nothing, so runners fall back to polling.
+
+        :param queue: Queue to listen to
+        """
+        return
+        yield
+
+    async def get_activity_cache_entry(self, key: str) -> ActivityCacheEntry | None:
+        """
+        Gets a memoized activity result from the shared cache tier.
+        Backends that do not support a shared cache can leave this as is, which always misses.
+
+        :param key: Cache key (activity name plus argument hash)
+        :return: The cache entry, none if it does not exist
+        """
+        return None
+
+    async def set_activity_cache_entry(self, entry: ActivityCacheEntry):
+        """
+        Stores a memoized activity result in the shared cache tier, replacing any existing entry for the key.
+        Backends can use the entry's expires_at_ns to expire it. The default does nothing.
+
+        :param entry: The cache entry
+        """
+        pass
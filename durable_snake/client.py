@@ -1,4 +1,40 @@
+from typing import Any, List
+
+from .backends import BaseBackend
+from .internal.workflow_signal import WorkflowSignal
+
 
 class Client:
+    def __init__(self, backend: BaseBackend):
+        self._backend = backend
+
     async def start_workflow(self):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    async def signal(
+        self, workflow_id: str, name: str, payload: Any = None, coalesce: bool = False
+    ) -> str:
+        """
+        Sends a signal to a workflow
+
+        :param workflow_id: Workflow ID
+        :param name: Signal name
+        :param payload: Signal payload, must be serializable
+        :param coalesce: If true, only the latest pending signal with this name is delivered
+        :return: Signal ID
+        """
+        signal = WorkflowSignal(
+            workflow_id=workflow_id, name=name, payload=payload, coalesce=coalesce
+        )
+        await self._backend.insert_workflow_signals([signal])
+        return signal.id
+
+    async def signal_many(self, signals: List[WorkflowSignal]) -> List[str]:
+        """
+        Sends many signals, possibly to different workflows, in a single backend write
+
+        :param signals: Signals to send
+        :return: Signal IDs
+        """
+        await self._backend.insert_workflow_signals(signals)
+        return [signal.id for signal in signals]
@@ -0,0 +1,160 @@
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import perf_counter_ns, time_ns
+from typing import TYPE_CHECKING
+
+from loguru import logger
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+from . import time_helpers
+
+if TYPE_CHECKING:
+    from ..backends.base import BaseBackend
+
+
+@dataclass
+class ActivityCacheOptions:
+    """
+    Opt-in memoization for pure activities, passed as `@activity(cache=...)`.
+    Only use this for deterministic activities where the same arguments always produce the same result.
+    """
+
+    ttl_sec: float | None = None
+    """How long a cached result is valid for. None means it lives until evicted"""
+    shared: bool = False
+    """Whether to also store results in the backend so other runners can reuse them. Only async activities
+    can use the shared tier."""
+
+
+class ActivityCacheEntry(BaseModel):
+    """
+    A memoized activity result, as stored in the shared (backend) tier
+    """
+
+    key: str
+    """Activity name plus a stable hash of the arguments"""
+    result: str
+    """The JSON encoded result"""
+    expires_at_ns: int | None = None
+    """When the entry expires in epoch nanoseconds, None if it never expires"""
+
+
+def activity_cache_key(activity_name: str, args: tuple, kwargs: dict) -> str:
+    """
+    Builds a stable cache key from the activity name and its arguments.
+    Arguments must be JSON serializable (pydantic models are supported).
+    """
+    serialized = json.dumps(
+        to_jsonable_python({"args": args, "kwargs": kwargs}),
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return f"{activity_name}:{hashlib.sha256(serialized.encode()).hexdigest()}"
+
+
+class ActivityCache:
+    """
+    A runner-local LRU cache of activity results with per-entry TTLs, optionally backed by a shared tier
+    stored through the backend.
+
+    Results are stored JSON encoded, so callers can't mutate cached values and every hit decodes a fresh copy.
+    """
+
+    def __init__(self, max_entries: int, backend: "BaseBackend | None" = None):
+        self._max_entries = max_entries
+        self._backend = backend
+        # key -> (expires_at_ns (perf counter), JSON encoded result)
+        self._entries: OrderedDict[str, tuple[int | None, bytes]] = OrderedDict()
+
+    def get_local(self, key: str) -> tuple[bool, bytes | None]:
+        """
+        Looks up a result in the local tier.
+
+        :return: Whether there was a hit, and the JSON encoded result
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires_at_ns, result = entry
+        if expires_at_ns is not None and perf_counter_ns() >= expires_at_ns:
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, result
+
+    def set_local(self, key: str, result: bytes, ttl_sec: float | None):
+        """
+        Stores a JSON encoded result in the local tier, evicting the least recently used entry if full.
+        """
+        if self._max_entries <= 0:
+            return
+
+        expires_at_ns = None
+        if ttl_sec is not None:
+            expires_at_ns = int(perf_counter_ns() + ttl_sec * time_helpers.second)
+
+        self._entries[key] = (expires_at_ns, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(
+        self, key: str, options: ActivityCacheOptions
+    ) -> tuple[bool, bytes | None]:
+        """
+        Looks up a result in the local tier, then the shared tier if enabled.
+        Shared hits are promoted into the local tier for no longer than the shared entry has left.
+        Shared tier errors are logged and treated as a miss.
+
+        :return: Whether there was a hit, and the JSON encoded result
+        """
+        hit, result = self.get_local(key)
+        if hit or not options.shared or self._backend is None:
+            return hit, result
+
+        try:
+            entry = await self._backend.get_activity_cache_entry(key)
+        except Exception:
+            logger.exception("Failed to get activity cache entry {}, treating as a miss", key)
+            return False, None
+        if entry is None:
+            return False, None
+        ttl_sec = options.ttl_sec
+        if entry.expires_at_ns is not None:
+            remaining_ns = entry.expires_at_ns - time_ns()
+            if remaining_ns <= 0:
+                return False, None
+            remaining_sec = remaining_ns / time_helpers.second
+            ttl_sec = remaining_sec if ttl_sec is None else min(ttl_sec, remaining_sec)
+
+        result = entry.result.encode()
+        self.set_local(key, result, ttl_sec)
+        return True, result
+
+    async def set(self, key: str, result: bytes, options: ActivityCacheOptions):
+        """
+        Stores a JSON encoded result in the local tier, and the shared tier if enabled.
+        Shared tier errors are logged and ignored.
+        """
+        self.set_local(key, result, options.ttl_sec)
+        if not options.shared or self._backend is None:
+            return
+
+        expires_at_ns = None
+        if options.ttl_sec is not None:
+            expires_at_ns = int(time_ns() + options.ttl_sec * time_helpers.second)
+        try:
+            await self._backend.set_activity_cache_entry(
+                ActivityCacheEntry(
+                    key=key,
+                    result=result.decode(),
+                    expires_at_ns=expires_at_ns,
+                )
+            )
+        except Exception:
+            logger.exception("Failed to set activity cache entry {}", key)
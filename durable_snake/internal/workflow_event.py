@@ -43,3 +43,4 @@ class WorkflowEvent(BaseModel):
     type: WorkflowEventType
     runner_id: str
     created_at_ns: int
+    data: dict | None = None
@@ -0,0 +1,99 @@
+import asyncio
+from time import time_ns
+from typing import Any, List
+from uuid import uuid4
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic_core import PydanticSerializationError, to_jsonable_python
+
+
+class WorkflowSignal(BaseModel):
+    """
+    A signal sent to a workflow, held in the backend's signal inbox until the workflow drains it
+    """
+    model_config = ConfigDict(frozen=True)  # signals are immutable
+
+    workflow_id: str
+    name: str
+    payload: Any = None
+    coalesce: bool = False
+    """If true, only the latest pending signal with this name is delivered, older ones are dropped.
+    Backends coalesce when inserting, so superseded values never reach the history."""
+    id: str = Field(default_factory=lambda: uuid4().hex)
+    """Unique ID of the signal, used to acknowledge it once drained"""
+    created_at_ns: int = Field(default_factory=time_ns)
+    recording_seq: int | None = None
+    """Sequence ID of the history event the signal is being recorded in. Set in the inbox right before
+    the event is written, so a signal left in the inbox can be checked against that one event."""
+
+    @field_validator("payload")
+    @classmethod
+    def _payload_serializable(cls, payload: Any) -> Any:
+        # Catch this when sending, otherwise it would fail every drain of the inbox
+        try:
+            to_jsonable_python(payload)
+        except PydanticSerializationError as e:
+            raise ValueError(f"signal payload is not serializable: {e}") from e
+        return payload
+
+
+def coalesce_signals(signals: List[WorkflowSignal]) -> List[WorkflowSignal]:
+    """
+    Drops coalescing signals that are superseded by a later coalescing signal with the same name,
+    preserving the order of the remaining signals. This only covers a single drained batch, coalescing
+    across batches is done by the backend on insert.
+    """
+    latest: dict[str, int] = {}
+    for i, signal in enumerate(signals):
+        if signal.coalesce:
+            latest[signal.name] = i
+
+    return [
+        signal
+        for i, signal in enumerate(signals)
+        if not signal.coalesce or latest[signal.name] == i
+    ]
+
+
+class SignalBuffer:
+    """
+    Signals that have been drained and recorded to history, waiting to be received by the workflow.
+    Coalescing signals replace any buffered signal with the same name, so unreceived progress updates
+    don't pile up.
+    """
+
+    def __init__(self):
+        self._signals: List[WorkflowSignal] = []
+        self._received = asyncio.Event()
+
+    def __len__(self):
+        return len(self._signals)
+
+    def extend(self, signals: List[WorkflowSignal]):
+        if len(signals) == 0:
+            return
+        self._signals = coalesce_signals(self._signals + signals)
+        self._received.set()
+
+    def take(self, name: str | None = None) -> List[WorkflowSignal]:
+        """
+        Removes and returns buffered signals in the order they were received.
+
+        :param name: Only take signals with this name, None for all
+        """
+        taken = [s for s in self._signals if name is None or s.name == name]
+        self._signals = [s for s in self._signals if name is not None and s.name != name]
+        return taken
+
+    async def wait(self, name: str | None = None) -> WorkflowSignal:
+        """
+        Removes and returns the oldest buffered signal, waiting for one if there are none.
+
+        :param name: Only wait for signals with this name, None for any
+        """
+        while True:
+            for i, signal in enumerate(self._signals):
+                if name is None or signal.name == name:
+                    return self._signals.pop(i)
+            self._received.clear()
+            await self._received.wait()
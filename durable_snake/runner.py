@@ -1,12 +1,20 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 from loguru import logger
-from time import perf_counter_ns
+from time import perf_counter_ns, time_ns
 
+from durable_snake.internal.activity_cache import ActivityCache
+from durable_snake.internal.workflow_event import WorkflowEvent, WorkflowEventType
 from durable_snake.internal.workflow_lock import WorkflowLock
+from durable_snake.internal.workflow_signal import (
+    SignalBuffer,
+    WorkflowSignal,
+    coalesce_signals,
+)
 
 from .backends import BaseBackend
-from .workflow import WorkflowInstance
+from .workflow import WorkflowInstance, WorkflowStatus
 from .internal.contexts import _workflow_execution_context
 from .internal import time_helpers
 
@@ -26,15 +34,30 @@ class RunnerOptions:
     """How long to hold a workflow lock before attempting to extend it. The runner will attempt to extend the lock
     if it is within 1/2 of the expiration time."""
 
+    listing_page_size: int = 100
+    """Page size hint used when streaming locks, pending workflows, and history from the backend"""
+
     shutdown_activity_timeout_sec: float = 5.0
     """How long to wait for the runner to stop all activities before shutting down"""
 
+    activity_cache_max_entries: int = 1024
+    """Max number of memoized activity results kept in the runner-local cache. 0 disables the local tier"""
+
+    signal_batch_size: int = 100
+    """Max number of signals drained from a workflow's inbox into a single history event"""
+
 
 @dataclass
 class _RunnerWorkflow:
     workflow: WorkflowInstance
     lock: WorkflowLock
     task: asyncio.Task
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    """Set when the workflow has been signaled, so the workflow loop can drain its inbox"""
+    signals: SignalBuffer = field(default_factory=SignalBuffer)
+    """Signals drained from the inbox and recorded to history, waiting to be received by the workflow"""
+    activity_results: List[dict] = field(default_factory=list)
+    """Results of activities the workflow has run, waiting to be recorded to the history"""
 
 
 class Runner:
@@ -42,25 +65,28 @@ class Runner:
     The workflow runner.
     """
 
-    _workflows: dict[str, _RunnerWorkflow] = {}
+    _workflows: dict[str, _RunnerWorkflow]
     _expired_locks_task: asyncio.Task | None = None
+    _wakeups_task: asyncio.Task | None = None
 
     def __init__(self, options: RunnerOptions):
         self._options = options
+        self._workflows = {}
+        self._activity_cache = ActivityCache(
+            options.activity_cache_max_entries, options.backend
+        )
         logger.debug("Runner {} initialized", self._options.id)
 
     async def start(self):
         """
         Starts the runner
         """
-        # Check for open locks that are owned by this runner
-        held_locks = await self._options.backend.list_locks_held_by_runner(
-            self._options.id
-        )
-        logger.trace("Found {} held locks", len(held_locks))
-
-        # Try to extend the locks
-        for lock in held_locks:
+        # Check for open locks that are owned by this runner, resuming each as it streams in
+        held_locks = 0
+        async for lock in self._options.backend.iter_locks_held_by_runner(
+            self._options.id, self._options.listing_page_size
+        ):
+            held_locks += 1
             logger.trace("Attempting to extend lock {}", lock)
             new_lock = lock.model_copy(
                 update={"expires_at_ns": perf_counter_ns() + time_helpers.second}
@@ -78,25 +104,17 @@ class Runner:
                 self._workflows[updated_lock.workflow_id] = _RunnerWorkflow(
                     workflow=workflow, lock=updated_lock, task=task
                 )
+        logger.trace("Found {} held locks", held_locks)
 
         # Check pending workflows (unclaimed)
-        pending_workflows = await self._options.backend.list_pending_workflows(
-            self._options.queue
-        )
-        logger.trace("Found {} pending workflows", len(pending_workflows))
-        for workflow in pending_workflows:
+        pending_workflows = 0
+        async for workflow in self._options.backend.iter_pending_workflows(
+            self._options.queue, self._options.listing_page_size
+        ):
+            pending_workflows += 1
             # Attempt to acquire the lock
             lock = await self._options.backend.acquire_extend_workflow_lock(
-                WorkflowLock(
-                    workflow_id=workflow.id,
-                    epoch=0,
-                    expires_at_ns=int(
-                        perf_counter_ns()
-                        + time_helpers.second
-                        * self._options.workflow_lock_expiration_sec
-                    ),
-                    runner_id=self._options.id,
-                )
+                self._new_workflow_lock(workflow.id)
             )
 
             if lock is None:
@@ -109,10 +127,14 @@ class Runner:
             self._workflows[workflow.id] = _RunnerWorkflow(
                 workflow=workflow, lock=lock, task=task
             )
+        logger.trace("Found {} pending workflows", pending_workflows)
 
         # Start expired locks loop (and run first one)
         self._expired_locks_task = asyncio.create_task(self._expired_locks_loop())
 
+        # Start listening for workflows that need to be woken up (e.g. signaled)
+        self._wakeups_task = asyncio.create_task(self._wakeups_loop())
+
     async def stop(self):
         """
         Stops the runner gracefully for the fastest possible workflow resuming by another worker
@@ -123,6 +145,10 @@ class Runner:
         if self._expired_locks_task is not None:
             self._expired_locks_task.cancel()
 
+        # Cancel wakeups loop
+        if self._wakeups_task is not None:
+            self._wakeups_task.cancel()
+
         # Cancel all workflow tasks
         pending_tasks = []
         for workflow_id, workflow_data in list(self._workflows.items()):
@@ -161,12 +187,35 @@ class Runner:
         A loop for a single workflow
         """
         logger.trace("Starting workflow loop for {}", workflow.id)
-        _workflow_execution_context.set({})
-        # TODO: Fetch the history as needed
-        # TODO: Execute the next step
-        # TODO: Handle workflow completion
-        # TODO: Handle workflow failure
-        # TODO: Handle workflow create as new
+        # The task is created right before the workflow is registered, so this is always present
+        runner_workflow = self._workflows[workflow.id]
+        _workflow_execution_context.set(
+            {
+                "activity_cache": self._activity_cache,
+                "activity_results": runner_workflow.activity_results,
+                "signals": runner_workflow.signals,
+            }
+        )
+        # TODO: Replay the history by streaming it with backend.iter_workflow_history, so it is never
+        #  fully loaded into memory
+        # Drain anything that was signaled while the workflow was not held
+        runner_workflow.wakeup.set()
+        while True:
+            await runner_workflow.wakeup.wait()
+            try:
+                await self._drain_signals(runner_workflow)
+            except Exception:
+                logger.exception("Failed to drain signals for workflow {}", workflow.id)
+            # TODO: Execute the next step, which receives signals through receive_signals/wait_for_signal
+            try:
+                await self._record_activity_results(runner_workflow)
+            except Exception:
+                logger.exception(
+                    "Failed to record activity results for workflow {}", workflow.id
+                )
+            # TODO: Handle workflow completion
+            # TODO: Handle workflow failure
+            # TODO: Handle workflow create as new
 
     async def _expired_locks_loop(self):
         """
@@ -174,8 +223,208 @@ class Runner:
         """
         while True:
             await asyncio.sleep(self._options.expired_locks_poll_sec)
-            expired_locks = await self._options.backend.list_expired_locks()
-            for lock in expired_locks:
+            async for lock in self._options.backend.iter_expired_locks(
+                self._options.listing_page_size
+            ):
                 logger.trace("Lock {} has expired", lock)
                 # TODO: Attempt to acquire the lock
                 # TODO: If successful, add to workflows
+
+    async def _wakeups_loop(self):
+        """
+        A loop for waking up workflows as soon as the backend publishes them, without waiting to poll.
+        If the wakeup stream fails it is restarted, if it ends the runner falls back to polling.
+        """
+        while True:
+            try:
+                async for workflow_id in self._options.backend.iter_workflow_wakeups(
+                    self._options.queue
+                ):
+                    await self._wakeup_workflow(workflow_id)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Workflow wakeup stream failed, restarting")
+                await asyncio.sleep(self._options.pending_workflows_poll_sec)
+
+    async def _wakeup_workflow(self, workflow_id: str):
+        """
+        Pokes a workflow held by this runner, or claims it if it is idle
+        """
+        runner_workflow = self._workflows.get(workflow_id)
+        if runner_workflow is not None:
+            # Already held by this runner, just poke the workflow loop
+            runner_workflow.wakeup.set()
+            return
+
+        try:
+            workflow = await self._options.backend.get_workflow_instance(workflow_id)
+            if workflow.queue != self._options.queue or workflow.status not in (
+                WorkflowStatus.PENDING,
+                WorkflowStatus.RUNNING,
+            ):
+                logger.trace(
+                    "Ignoring wakeup for workflow {} with status {} on queue {}",
+                    workflow_id,
+                    workflow.status,
+                    workflow.queue,
+                )
+                return
+
+            # Idle workflow, try to claim it
+            lock = await self._options.backend.acquire_extend_workflow_lock(
+                self._new_workflow_lock(workflow_id)
+            )
+        except Exception:
+            logger.exception("Failed to claim woken workflow {}", workflow_id)
+            return
+
+        if lock is None:
+            logger.trace(
+                "Failed to acquire lock for woken workflow {}, continuing", workflow_id
+            )
+            return
+
+        logger.trace("Claimed woken workflow {}", workflow_id)
+        task = asyncio.create_task(self._workflow_loop(workflow))
+        self._workflows[workflow_id] = _RunnerWorkflow(
+            workflow=workflow, lock=lock, task=task
+        )
+
+    async def _drain_signals(
+        self, runner_workflow: _RunnerWorkflow
+    ) -> List[WorkflowSignal]:
+        """
+        Drains a batch of signals from the workflow's inbox, recording them as a single history event and
+        buffering them for the workflow before removing them from the inbox.
+
+        Signals are marked in the inbox with the sequence ID of the event they are being recorded in. If
+        removing them fails (or the runner crashes first), later drains check that event and skip the
+        signals it recorded, so they are never recorded or delivered twice. Removal is retried on every drain.
+
+        :return: The newly drained signals, with superseded coalescing signals dropped
+        """
+        runner_workflow.wakeup.clear()
+        workflow = runner_workflow.workflow
+        pending = await self._options.backend.list_workflow_signals(
+            workflow.id, self._options.signal_batch_size
+        )
+        if len(pending) == 0:
+            return []
+
+        if len(pending) == self._options.signal_batch_size:
+            # There may be more, come back for the next batch
+            runner_workflow.wakeup.set()
+
+        recorded_ids = await self._recorded_signal_ids(workflow.id, pending)
+        new = [signal for signal in pending if signal.id not in recorded_ids]
+        signals = coalesce_signals(new)
+        if len(new) > 0:
+            sequence_id = workflow.history_length
+            new_ids = [signal.id for signal in new]
+            await self._options.backend.mark_workflow_signals_recording(
+                workflow.id, new_ids, sequence_id, runner_workflow.lock
+            )
+            await self._options.backend.insert_workflow_event_history(
+                WorkflowEvent(
+                    sequence_id=sequence_id,
+                    type=WorkflowEventType.SIGNAL_RECEIVED,
+                    runner_id=self._options.id,
+                    created_at_ns=time_ns(),
+                    data={
+                        "signals": [
+                            signal.model_dump(mode="json", exclude={"recording_seq"})
+                            for signal in signals
+                        ],
+                        # Includes coalesced signals, so they are skipped too if the delete fails
+                        "signal_ids": new_ids,
+                    },
+                ),
+                runner_workflow.lock,
+            )
+            workflow.history_length += 1
+            runner_workflow.signals.extend(signals)
+
+        try:
+            await self._options.backend.delete_workflow_signals(
+                workflow.id, [signal.id for signal in pending], runner_workflow.lock
+            )
+        except Exception:
+            logger.exception(
+                "Failed to remove recorded signals from the inbox of workflow {}, retrying on the next drain",
+                workflow.id,
+            )
+        logger.trace(
+            "Drained {} signals ({} new, {} after coalescing) for workflow {}",
+            len(pending),
+            len(new),
+            len(signals),
+            workflow.id,
+        )
+        return signals
+
+    async def _recorded_signal_ids(
+        self, workflow_id: str, pending: List[WorkflowSignal]
+    ) -> set[str]:
+        """
+        Gets the IDs of pending signals that were already recorded to the history, by checking the event each
+        one was marked with. Only signals left over from a failed drain are marked, so this is normally free.
+        """
+        marked: dict[int, set[str]] = {}
+        for signal in pending:
+            if signal.recording_seq is not None:
+                marked.setdefault(signal.recording_seq, set()).add(signal.id)
+
+        recorded_ids: set[str] = set()
+        for sequence_id, signal_ids in marked.items():
+            history = self._options.backend.iter_workflow_history(
+                workflow_id, after_seq=sequence_id - 1, page_size=1
+            )
+            try:
+                event = await anext(history, None)
+            finally:
+                await history.aclose()
+
+            if (
+                event is not None
+                and event.sequence_id == sequence_id
+                and event.type == WorkflowEventType.SIGNAL_RECEIVED
+                and event.data
+            ):
+                recorded_ids |= signal_ids & set(event.data.get("signal_ids", []))
+        return recorded_ids
+
+    async def _record_activity_results(self, runner_workflow: _RunnerWorkflow):
+        """
+        Records the results of activities the workflow has run to the history, in the order they completed.
+        Cached and executed results are recorded identically.
+        """
+        workflow = runner_workflow.workflow
+        while len(runner_workflow.activity_results) > 0:
+            await self._options.backend.insert_workflow_event_history(
+                WorkflowEvent(
+                    sequence_id=workflow.history_length,
+                    type=WorkflowEventType.ACTIVITY_COMPLETED,
+                    runner_id=self._options.id,
+                    created_at_ns=time_ns(),
+                    data=runner_workflow.activity_results[0],
+                ),
+                runner_workflow.lock,
+            )
+            workflow.history_length += 1
+            runner_workflow.activity_results.pop(0)
+
+    def _new_workflow_lock(self, workflow_id: str) -> WorkflowLock:
+        """
+        Builds a fresh lock for claiming an unheld workflow
+        """
+        return WorkflowLock(
+            workflow_id=workflow_id,
+            epoch=0,
+            expires_at_ns=int(
+                perf_counter_ns()
+                + time_helpers.second * self._options.workflow_lock_expiration_sec
+            ),
+            runner_id=self._options.id,
+        )
@@ -1,10 +1,14 @@
 from enum import Enum
 import inspect
-from pydantic import BaseModel
+from loguru import logger
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import PydanticSerializationError, to_jsonable_python
 import functools
-from typing import Callable, TypeVar, cast
+from typing import Any, Callable, List, TypeVar, cast, get_type_hints
 
+from .internal.activity_cache import ActivityCacheOptions, activity_cache_key
 from .internal.contexts import _workflow_execution_context
+from .internal.workflow_signal import SignalBuffer, WorkflowSignal
 
 
 class WorkflowStatus(Enum):
@@ -42,13 +46,51 @@ class WorkflowInstance(BaseModel):
     history_bytes: int = 0
 
 
+def _signal_buffer() -> SignalBuffer:
+    context = _workflow_execution_context.get()
+    if context is None or "signals" not in context:
+        raise RuntimeError("signals can only be received from inside a workflow")
+    return context["signals"]
+
+
+def receive_signals(name: str | None = None) -> List[WorkflowSignal]:
+    """
+    Receives the signals that have been delivered to the current workflow, without waiting.
+
+    :param name: Only receive signals with this name, None for all
+    :return: Signals in the order they were delivered
+    """
+    return _signal_buffer().take(name)
+
+
+async def wait_for_signal(name: str | None = None) -> WorkflowSignal:
+    """
+    Waits for the next signal delivered to the current workflow.
+
+    :param name: Only wait for signals with this name, None for any
+    :return: The signal
+    """
+    return await _signal_buffer().wait(name)
+
+
 F = TypeVar("F", bound=Callable)
 
 
-def activity(var_name: str | None = None):
+def activity(
+    var_name: str | None = None, cache: ActivityCacheOptions | bool | None = None
+):
     """
     Decorate a function to be a workflow activity.
 
+    Pass `cache=True` (or `ActivityCacheOptions`) to memoize a pure activity by its name and arguments. A cache
+    hit returns the stored result without executing the function again. Cached results are stored as JSON and
+    restored through the function's return annotation (plain JSON types if there is none), so hits return a
+    fresh copy. Calls with arguments that can't be serialized, or results that don't decode back to an equal
+    value (e.g. a tuple without a return annotation), are not cached.
+
+    Inside a workflow, every result is recorded to the workflow's activity results, the same way for cache hits
+    and misses.
+
     Usage:
         @activity("request_id")
         async def process_request(request_id):
@@ -61,13 +103,20 @@ def activity(var_name: str | None = None):
         def perform_operation():
             current_user = perform_operation.context_var.get()
             ...
+
+        @activity(cache=ActivityCacheOptions(ttl_sec=60, shared=True))
+        async def resolve_config(name):
+            ...
     """
     print("activity decorator")
 
+    cache_options = ActivityCacheOptions() if cache is True else cache or None
+
     def decorator(func: F) -> F:
         nonlocal var_name
         if var_name is None:
             var_name = func.__name__
+        activity_name = f"{func.__module__}.{func.__qualname__}"
 
         # # Create context variable attached to the function
         # context_var = contextvars.ContextVar(var_name, default=default)
@@ -75,11 +124,94 @@ def activity(var_name: str | None = None):
         # # Attach the context variable to the function for easy access
         # setattr(func, 'context_var', context_var)
 
+        def get_activity_cache():
+            if cache_options is None:
+                return None
+            context = _workflow_execution_context.get()
+            if context is None:
+                return None
+            return context.get("activity_cache")
+
+        def record_result(result):
+            # Hits and misses return equal results, so they produce identical history
+            context = _workflow_execution_context.get()
+            if context is None or "activity_results" not in context:
+                return
+            context["activity_results"].append(
+                {
+                    "activity": activity_name,
+                    "result": to_jsonable_python(result, fallback=repr),
+                }
+            )
+
+        result_adapter: TypeAdapter | None = None
+
+        def get_result_adapter() -> TypeAdapter:
+            # Built lazily so forward references in the return annotation can resolve
+            nonlocal result_adapter
+            if result_adapter is None:
+                try:
+                    return_type = get_type_hints(func).get("return", Any)
+                    result_adapter = TypeAdapter(return_type)
+                except Exception:
+                    logger.exception(
+                        "Failed to build result type for activity {}, caching results as plain JSON",
+                        activity_name,
+                    )
+                    result_adapter = TypeAdapter(Any)
+            return result_adapter
+
+        def get_cache_key(args, kwargs) -> str | None:
+            try:
+                return activity_cache_key(activity_name, args, kwargs)
+            except (PydanticSerializationError, TypeError, ValueError):
+                logger.warning(
+                    "Arguments for activity {} are not serializable, running without cache",
+                    activity_name,
+                )
+                return None
+
+        def encode_result(result) -> bytes | None:
+            """
+            Encodes a result for the cache, or None if it would not decode back to an equal value
+            """
+            try:
+                encoded = get_result_adapter().dump_json(result, warnings=False)
+                round_tripped = get_result_adapter().validate_json(encoded)
+            except (PydanticSerializationError, ValidationError, TypeError, ValueError):
+                logger.warning(
+                    "Result of activity {} does not round trip through JSON, not caching it",
+                    activity_name,
+                )
+                return None
+
+            if round_tripped != result:
+                logger.warning(
+                    "Result of activity {} changes when decoded from JSON, not caching it",
+                    activity_name,
+                )
+                return None
+            return encoded
+
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs):
             print("params", *args, **kwargs)
             print("workflow context", _workflow_execution_context.get())
-            result = func(*args, **kwargs)
+            activity_cache = get_activity_cache()
+            key = get_cache_key(args, kwargs) if activity_cache is not None else None
+            if key is None:
+                result = func(*args, **kwargs)
+            else:
+                # Sync activities can't await the backend, so they only use the local tier
+                hit, encoded = activity_cache.get_local(key)
+                if hit:
+                    result = get_result_adapter().validate_json(encoded)
+                else:
+                    result = func(*args, **kwargs)
+                    encoded = encode_result(result)
+                    if encoded is not None:
+                        activity_cache.set_local(key, encoded, cache_options.ttl_sec)
+            record_result(result)
             print("result", result)
             return result
 
@@ -87,7 +219,20 @@ def activity(var_name: str | None = None):
         async def async_wrapper(*args, **kwargs):
             print("params", *args, **kwargs)
             print("workflow context", _workflow_execution_context.get())
-            result = await func(*args, **kwargs)
+            activity_cache = get_activity_cache()
+            key = get_cache_key(args, kwargs) if activity_cache is not None else None
+            if key is None:
+                result = await func(*args, **kwargs)
+            else:
+                hit, encoded = await activity_cache.get(key, cache_options)
+                if hit:
+                    result = get_result_adapter().validate_json(encoded)
+                else:
+                    result = await func(*args, **kwargs)
+                    encoded = encode_result(result)
+                    if encoded is not None:
+                        await activity_cache.set(key, encoded, cache_options)
+            record_result(result)
             print("result", result)
             return result
 
@@ -0,0 +1,271 @@
+import asyncio
+from datetime import datetime
+from time import sleep, time_ns
+
+from pydantic import BaseModel
+
+from durable_snake.backends import BaseBackend
+from durable_snake.internal import time_helpers
+from durable_snake.internal.activity_cache import (
+    ActivityCache,
+    ActivityCacheEntry,
+    ActivityCacheOptions,
+    activity_cache_key,
+)
+from durable_snake.internal.contexts import _workflow_execution_context
+from durable_snake.internal.workflow_event import WorkflowEventType
+from durable_snake.internal.workflow_lock import WorkflowLock
+from durable_snake.runner import Runner, RunnerOptions, _RunnerWorkflow
+from durable_snake.workflow import WorkflowInstance, WorkflowStatus, activity
+
+
+class MemoryCacheBackend(BaseBackend):
+    def __init__(self):
+        super().__init__()
+        self.entries: dict[str, ActivityCacheEntry] = {}
+
+    async def get_activity_cache_entry(self, key):
+        return self.entries.get(key)
+
+    async def set_activity_cache_entry(self, entry):
+        self.entries[entry.key] = entry
+
+
+class FailingCacheBackend(BaseBackend):
+    async def get_activity_cache_entry(self, key):
+        raise ConnectionError("backend down")
+
+    async def set_activity_cache_entry(self, entry):
+        raise ConnectionError("backend down")
+
+
+class HistoryBackend(BaseBackend):
+    def __init__(self):
+        super().__init__()
+        self.history = []
+
+    async def insert_workflow_event_history(self, event, lock):
+        self.history.append(event)
+
+
+class Config(BaseModel):
+    name: str
+    value: int
+
+
+def run_in_workflow(coro_fn, cache: ActivityCache, activity_results: list | None = None):
+    async def main():
+        context = {"activity_cache": cache}
+        if activity_results is not None:
+            context["activity_results"] = activity_results
+        _workflow_execution_context.set(context)
+        return await coro_fn()
+
+    return asyncio.run(main())
+
+
+def test_cache_key_is_stable():
+    assert activity_cache_key("a", (1,), {"x": 1, "y": 2}) == activity_cache_key(
+        "a", (1,), {"y": 2, "x": 1}
+    )
+    assert activity_cache_key("a", (1,), {}) != activity_cache_key("a", (2,), {})
+    assert activity_cache_key("a", (1,), {}) != activity_cache_key("b", (1,), {})
+
+
+def test_lru_eviction():
+    cache = ActivityCache(2)
+    cache.set_local("a", b"1", None)
+    cache.set_local("b", b"2", None)
+    assert cache.get_local("a") == (True, b"1")  # a is now most recently used
+    cache.set_local("c", b"3", None)
+
+    assert cache.get_local("b") == (False, None)
+    assert cache.get_local("a") == (True, b"1")
+    assert cache.get_local("c") == (True, b"3")
+
+
+def test_ttl_expiry():
+    cache = ActivityCache(10)
+    cache.set_local("a", b"1", 0.01)
+    assert cache.get_local("a") == (True, b"1")
+    sleep(0.02)
+    assert cache.get_local("a") == (False, None)
+
+
+def test_hit_skips_execution():
+    calls = []
+
+    @activity(cache=True)
+    async def double(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    async def main():
+        return [await double(2), await double(2), await double(3)]
+
+    assert run_in_workflow(main, ActivityCache(10)) == [4, 4, 6]
+    assert calls == [2, 3]
+
+
+def test_sync_activity_hit_skips_execution():
+    calls = []
+
+    @activity(cache=True)
+    def double(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    async def main():
+        return [double(2), double(2)]
+
+    assert run_in_workflow(main, ActivityCache(10)) == [4, 4]
+    assert calls == [2]
+
+
+def test_hits_return_fresh_copies():
+    @activity(cache=True)
+    def lookup(x: int) -> dict:
+        return {"v": x}
+
+    async def main():
+        first = lookup(1)
+        first["v"] = 99
+        return lookup(1)
+
+    assert run_in_workflow(main, ActivityCache(10)) == {"v": 1}
+
+
+def test_shared_hit_restores_return_type():
+    backend = MemoryCacheBackend()
+    options = ActivityCacheOptions(shared=True)
+
+    @activity(cache=options)
+    async def get_config(name: str) -> Config:
+        return Config(name=name, value=1)
+
+    async def main():
+        return await get_config("a")
+
+    miss = run_in_workflow(main, ActivityCache(10, backend))
+    # A different runner only has the shared tier
+    hit = run_in_workflow(main, ActivityCache(10, backend))
+    assert isinstance(miss, Config)
+    assert isinstance(hit, Config)
+    assert hit == miss
+
+
+def test_shared_hit_promoted_with_remaining_ttl():
+    backend = MemoryCacheBackend()
+    key = activity_cache_key("a", (), {})
+    asyncio.run(
+        backend.set_activity_cache_entry(
+            ActivityCacheEntry(
+                key=key,
+                result="1",
+                expires_at_ns=time_ns() + int(0.01 * time_helpers.second),
+            )
+        )
+    )
+
+    cache = ActivityCache(10, backend)
+    assert asyncio.run(cache.get(key, ActivityCacheOptions(ttl_sec=60, shared=True))) == (
+        True,
+        b"1",
+    )
+    sleep(0.02)
+    assert cache.get_local(key) == (False, None)
+
+
+def test_unserializable_arguments_run_uncached():
+    calls = []
+
+    @activity(cache=True)
+    async def describe(thing) -> str:
+        calls.append(thing)
+        return "ok"
+
+    unserializable = object()
+
+    async def main():
+        return [await describe(unserializable), await describe(unserializable)]
+
+    assert run_in_workflow(main, ActivityCache(10)) == ["ok", "ok"]
+    assert len(calls) == 2
+
+
+def test_shared_tier_errors_fall_through():
+    calls = []
+
+    @activity(cache=ActivityCacheOptions(shared=True))
+    async def double(x: int) -> int:
+        calls.append(x)
+        return x * 2
+
+    async def main():
+        return await double(2)
+
+    assert run_in_workflow(main, ActivityCache(10, FailingCacheBackend())) == 4
+    assert calls == [2]
+
+
+def test_miss_returns_real_result():
+    calls = []
+
+    @activity(cache=True)
+    def stamp(x: int):
+        calls.append(x)
+        return x, datetime(2020, 1, 1)
+
+    @activity(cache=True)
+    def mistyped(x: int) -> int:
+        return "abc"
+
+    async def main():
+        return [stamp(1), stamp(1), mistyped(1)]
+
+    first, second, wrong = run_in_workflow(main, ActivityCache(10))
+    assert first == (1, datetime(2020, 1, 1))
+    assert second == first
+    assert calls == [1, 1]  # a tuple doesn't round trip through JSON, so it isn't cached
+    assert wrong == "abc"
+
+
+def test_hit_and_miss_record_identical_history():
+    calls = []
+
+    @activity(cache=True)
+    async def get_config(name: str) -> Config:
+        calls.append(name)
+        return Config(name=name, value=1)
+
+    async def main():
+        return [await get_config("a"), await get_config("a")]
+
+    activity_results = []
+    run_in_workflow(main, ActivityCache(10), activity_results)
+    assert calls == ["a"]
+
+    backend = HistoryBackend()
+    runner = Runner(RunnerOptions(id="runner1", queue="queue1", backend=backend))
+    runner_workflow = _RunnerWorkflow(
+        workflow=WorkflowInstance(
+            id="wf",
+            type="test",
+            status=WorkflowStatus.RUNNING,
+            queue="queue1",
+            created_ns=0,
+            started_ns=0,
+            closed_ns=0,
+        ),
+        lock=WorkflowLock(workflow_id="wf", expires_at_ns=0, runner_id="runner1"),
+        task=None,
+        activity_results=activity_results,
+    )
+    asyncio.run(runner._record_activity_results(runner_workflow))
+
+    miss, hit = backend.history
+    assert miss.type == hit.type == WorkflowEventType.ACTIVITY_COMPLETED
+    assert miss.data == hit.data
+    assert miss.data["result"] == {"name": "a", "value": 1}
+    assert [e.sequence_id for e in backend.history] == [0, 1]
+    assert activity_results == []
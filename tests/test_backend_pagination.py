@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from durable_snake.backends import BaseBackend, Page
+from durable_snake.internal.workflow_event import WorkflowEvent, WorkflowEventType
+from durable_snake.internal.workflow_lock import WorkflowLock
+from durable_snake.runner import Runner, RunnerOptions
+from durable_snake.workflow import WorkflowInstance, WorkflowStatus
+
+
+class HistoryBackend(BaseBackend):
+    def __init__(self, length: int):
+        super().__init__()
+        self.calls = 0
+        self.events = [
+            WorkflowEvent(
+                sequence_id=i,
+                type=WorkflowEventType.TIMER_FIRED,
+                runner_id="runner1",
+                created_at_ns=0,
+            )
+            for i in range(length)
+        ]
+
+    async def get_workflow_history(self, workflow_id, after_seq=None):
+        self.calls += 1
+        return [e for e in self.events if after_seq is None or e.sequence_id > after_seq]
+
+
+class PagedHistoryBackend(HistoryBackend):
+    async def get_workflow_history_page(self, workflow_id, cursor=None, page_size=100):
+        events = await self.get_workflow_history(
+            workflow_id, int(cursor) if cursor is not None else None
+        )
+        if len(events) <= page_size:
+            return Page(items=events)
+        events = events[:page_size]
+        return Page(items=events, next_cursor=str(events[-1].sequence_id))
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def test_default_history_is_a_single_fetch():
+    backend = HistoryBackend(1000)
+    events = asyncio.run(collect(backend.iter_workflow_history("wf", page_size=10)))
+    assert [e.sequence_id for e in events] == list(range(1000))
+    assert backend.calls == 1
+
+
+def test_history_after_seq():
+    backend = HistoryBackend(10)
+    events = asyncio.run(collect(backend.iter_workflow_history("wf", after_seq=6)))
+    assert [e.sequence_id for e in events] == [7, 8, 9]
+
+
+def test_overridden_page_follows_cursor():
+    backend = PagedHistoryBackend(10)
+    events = asyncio.run(collect(backend.iter_workflow_history("wf", page_size=3)))
+    assert [e.sequence_id for e in events] == list(range(10))
+    assert backend.calls == 4
+
+
+def test_invalid_page_size():
+    backend = HistoryBackend(10)
+    with pytest.raises(ValueError):
+        asyncio.run(collect(backend.iter_workflow_history("wf", page_size=0)))
+
+
+class ListingBackend(BaseBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def list_pending_workflows(self, queue):
+        self.calls += 1
+        return [make_instance("wf1")]
+
+    async def list_expired_locks(self):
+        self.calls += 1
+        return [make_lock("wf1")]
+
+    async def list_locks_held_by_runner(self, runner_id):
+        self.calls += 1
+        return [make_lock("wf1")]
+
+
+class PagedRunnerBackend(BaseBackend):
+    """Serves two pages of held locks and pending workflows, noting what the runner launched before page 2"""
+
+    def __init__(self):
+        super().__init__()
+        self.runner = None
+        self.launched_before_second_page = {}
+
+    def _page(self, listing: str, cursor, first, second):
+        if cursor is None:
+            return Page(items=[first], next_cursor="1")
+        if self.runner is not None:
+            self.launched_before_second_page[listing] = set(self.runner._workflows)
+        return Page(items=[second])
+
+    async def list_locks_held_by_runner_page(self, runner_id, cursor=None, page_size=100):
+        return self._page("held", cursor, make_lock("held1"), make_lock("held2"))
+
+    async def list_pending_workflows_page(self, queue, cursor=None, page_size=100):
+        return self._page(
+            "pending", cursor, make_instance("pending1"), make_instance("pending2")
+        )
+
+    async def acquire_extend_workflow_lock(self, new_lock, old_lock=None):
+        return new_lock
+
+    async def get_workflow_instance(self, workflow_id):
+        return make_instance(workflow_id)
+
+    async def list_workflow_signals(self, workflow_id, limit=100):
+        return []
+
+
+def make_instance(workflow_id: str) -> WorkflowInstance:
+    return WorkflowInstance(
+        id=workflow_id,
+        type="test",
+        status=WorkflowStatus.PENDING,
+        queue="queue1",
+        created_ns=0,
+        started_ns=0,
+        closed_ns=0,
+    )
+
+
+def make_lock(workflow_id: str) -> WorkflowLock:
+    return WorkflowLock(workflow_id=workflow_id, expires_at_ns=0, runner_id="runner1")
+
+
+@pytest.mark.parametrize(
+    "iterate",
+    [
+        lambda backend: backend.iter_pending_workflows("queue1", page_size=1),
+        lambda backend: backend.iter_expired_locks(page_size=1),
+        lambda backend: backend.iter_locks_held_by_runner("runner1", page_size=1),
+    ],
+)
+def test_default_listings_are_a_single_fetch(iterate):
+    backend = ListingBackend()
+    items = asyncio.run(collect(iterate(backend)))
+    assert len(items) == 1
+    assert backend.calls == 1
+
+
+@pytest.mark.parametrize(
+    "fetch_page",
+    [
+        lambda backend: backend.list_pending_workflows_page("queue1", cursor="1"),
+        lambda backend: backend.list_expired_locks_page(cursor="1"),
+        lambda backend: backend.list_locks_held_by_runner_page("runner1", cursor="1"),
+    ],
+)
+def test_default_listing_rejects_cursor(fetch_page):
+    with pytest.raises(ValueError):
+        asyncio.run(fetch_page(ListingBackend()))
+
+
+def test_overridden_lock_pages_follow_cursor():
+    backend = PagedRunnerBackend()
+    locks = asyncio.run(collect(backend.iter_locks_held_by_runner("runner1")))
+    assert [lock.workflow_id for lock in locks] == ["held1", "held2"]
+
+
+def test_runner_start_launches_workflows_as_pages_stream_in():
+    async def main():
+        backend = PagedRunnerBackend()
+        runner = Runner(RunnerOptions(id="runner1", queue="queue1", backend=backend))
+        backend.runner = runner
+        await runner.start()
+
+        runner._expired_locks_task.cancel()
+        runner._wakeups_task.cancel()
+        for runner_workflow in runner._workflows.values():
+            runner_workflow.task.cancel()
+        return backend, runner
+
+    backend, runner = asyncio.run(main())
+    assert backend.launched_before_second_page == {
+        "held": {"held1"},
+        "pending": {"held1", "held2", "pending1"},
+    }
+    assert set(runner._workflows) == {"held1", "held2", "pending1", "pending2"}
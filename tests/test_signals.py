@@ -0,0 +1,372 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from durable_snake.backends import BaseBackend
+from durable_snake.client import Client
+from durable_snake.internal.contexts import _workflow_execution_context
+from durable_snake.internal.workflow_event import WorkflowEventType
+from durable_snake.internal.workflow_lock import WorkflowLock
+from durable_snake.internal.workflow_signal import (
+    SignalBuffer,
+    WorkflowSignal,
+    coalesce_signals,
+)
+from durable_snake.runner import Runner, RunnerOptions, _RunnerWorkflow
+from durable_snake.workflow import (
+    WorkflowInstance,
+    WorkflowStatus,
+    receive_signals,
+    wait_for_signal,
+)
+
+
+class MemorySignalBackend(BaseBackend):
+    def __init__(self):
+        super().__init__()
+        self.inbox: list[WorkflowSignal] = []
+        self.history = []
+        self.instances: dict[str, WorkflowInstance] = {}
+        self.locks: dict[str, WorkflowLock] = {}
+        self.wakeups: asyncio.Queue[str] = asyncio.Queue()
+        self.insert_calls = 0
+        self.fail_deletes = False
+        self.fail_history = False
+
+    async def insert_workflow_signals(self, signals):
+        self.insert_calls += 1
+        for signal in signals:
+            if signal.coalesce:
+                self.inbox = [
+                    s
+                    for s in self.inbox
+                    if not (s.workflow_id == signal.workflow_id and s.name == signal.name)
+                ]
+            self.inbox.append(signal)
+            self.wakeups.put_nowait(signal.workflow_id)
+
+    async def list_workflow_signals(self, workflow_id, limit=100):
+        return [s for s in self.inbox if s.workflow_id == workflow_id][:limit]
+
+    async def mark_workflow_signals_recording(
+        self, workflow_id, signal_ids, sequence_id, lock
+    ):
+        self.inbox = [
+            s.model_copy(update={"recording_seq": sequence_id})
+            if s.id in signal_ids
+            else s
+            for s in self.inbox
+        ]
+
+    async def delete_workflow_signals(self, workflow_id, signal_ids, lock):
+        if self.fail_deletes:
+            raise RuntimeError("delete failed")
+        self.inbox = [s for s in self.inbox if s.id not in signal_ids]
+
+    async def insert_workflow_event_history(self, event, lock):
+        if self.fail_history:
+            raise RuntimeError("history write failed")
+        self.history.append(event)
+
+    async def get_workflow_history(self, workflow_id, after_seq=None):
+        return [
+            e for e in self.history if after_seq is None or e.sequence_id > after_seq
+        ]
+
+    async def get_workflow_instance(self, workflow_id):
+        return self.instances[workflow_id]
+
+    async def acquire_extend_workflow_lock(self, new_lock, old_lock=None):
+        if old_lock is None and new_lock.workflow_id in self.locks:
+            return None
+        self.locks[new_lock.workflow_id] = new_lock
+        return new_lock
+
+    async def iter_workflow_wakeups(self, queue):
+        while True:
+            yield await self.wakeups.get()
+
+
+def make_instance(
+    workflow_id: str,
+    status: WorkflowStatus = WorkflowStatus.PENDING,
+    queue: str = "queue1",
+) -> WorkflowInstance:
+    return WorkflowInstance(
+        id=workflow_id,
+        type="test",
+        status=status,
+        queue=queue,
+        created_ns=0,
+        started_ns=0,
+        closed_ns=0,
+    )
+
+
+def make_runner(backend: BaseBackend, **kwargs) -> Runner:
+    return Runner(
+        RunnerOptions(id="runner1", queue="queue1", backend=backend, **kwargs)
+    )
+
+
+def make_runner_workflow(workflow_id: str = "wf") -> _RunnerWorkflow:
+    return _RunnerWorkflow(
+        workflow=make_instance(workflow_id),
+        lock=WorkflowLock(workflow_id=workflow_id, expires_at_ns=0, runner_id="runner1"),
+        task=None,
+    )
+
+
+def signal_payloads(event) -> list:
+    return [s["payload"] for s in event.data["signals"]]
+
+
+def test_coalesce_signals_keeps_latest_per_name():
+    signals = [
+        WorkflowSignal(workflow_id="wf", name="progress", payload=1, coalesce=True),
+        WorkflowSignal(workflow_id="wf", name="log", payload="a"),
+        WorkflowSignal(workflow_id="wf", name="progress", payload=2, coalesce=True),
+        WorkflowSignal(workflow_id="wf", name="log", payload="b"),
+    ]
+    assert [s.payload for s in coalesce_signals(signals)] == ["a", 2, "b"]
+
+
+def test_client_signal_and_signal_many():
+    async def main():
+        backend = MemorySignalBackend()
+        client = Client(backend)
+        signal_id = await client.signal("wf", "progress", {"pct": 10})
+        ids = await client.signal_many(
+            [
+                WorkflowSignal(workflow_id="wf", name="a"),
+                WorkflowSignal(workflow_id="other", name="b"),
+            ]
+        )
+        return backend, signal_id, ids
+
+    backend, signal_id, ids = asyncio.run(main())
+    assert backend.insert_calls == 2
+    assert [s.id for s in backend.inbox] == [signal_id, *ids]
+    assert backend.inbox[0].payload == {"pct": 10}
+
+
+def test_unserializable_payload_rejected_on_send():
+    async def main():
+        backend = MemorySignalBackend()
+        with pytest.raises(ValidationError):
+            await Client(backend).signal("wf", "bad", object())
+        return backend
+
+    assert asyncio.run(main()).inbox == []
+
+
+def test_drain_records_batches_in_single_events():
+    async def main():
+        backend = MemorySignalBackend()
+        await Client(backend).signal_many(
+            [WorkflowSignal(workflow_id="wf", name="n", payload=i) for i in range(3)]
+        )
+        runner = make_runner(backend, signal_batch_size=2)
+        runner_workflow = make_runner_workflow()
+
+        first = await runner._drain_signals(runner_workflow)
+        more = runner_workflow.wakeup.is_set()
+        second = await runner._drain_signals(runner_workflow)
+        return backend, runner_workflow, first, more, second
+
+    backend, runner_workflow, first, more, second = asyncio.run(main())
+    assert [s.payload for s in first] == [0, 1]
+    assert more  # a full batch means there may be more
+    assert [s.payload for s in second] == [2]
+    assert not runner_workflow.wakeup.is_set()
+    assert [signal_payloads(e) for e in backend.history] == [[0, 1], [2]]
+    assert [e.sequence_id for e in backend.history] == [0, 1]
+    assert backend.inbox == []
+
+
+def test_failed_deletes_never_record_signals_twice():
+    async def main():
+        backend = MemorySignalBackend()
+        client = Client(backend)
+        runner = make_runner(backend)
+        runner_workflow = make_runner_workflow()
+
+        backend.fail_deletes = True
+        await client.signal("wf", "n", 1)
+        await runner._drain_signals(runner_workflow)
+        await client.signal("wf", "n", 2)
+        await runner._drain_signals(runner_workflow)
+
+        backend.fail_deletes = False
+        await client.signal("wf", "n", 3)
+        await runner._drain_signals(runner_workflow)
+        return backend, runner_workflow
+
+    backend, runner_workflow = asyncio.run(main())
+    assert [signal_payloads(e) for e in backend.history] == [[1], [2], [3]]
+    assert [s.payload for s in runner_workflow.signals.take()] == [1, 2, 3]
+    assert backend.inbox == []
+
+
+def test_recorded_signals_skipped_after_claim_by_new_runner():
+    async def main():
+        backend = MemorySignalBackend()
+        client = Client(backend)
+        await client.signal("wf", "n", 1)
+
+        backend.fail_deletes = True
+        await make_runner(backend)._drain_signals(make_runner_workflow())
+
+        # Another runner picks the workflow up with no local state
+        backend.fail_deletes = False
+        await client.signal("wf", "n", 2)
+        runner_workflow = make_runner_workflow()
+        runner_workflow.workflow.history_length = 1
+        drained = await make_runner(backend)._drain_signals(runner_workflow)
+        return backend, drained
+
+    backend, drained = asyncio.run(main())
+    assert [s.payload for s in drained] == [2]
+    assert [signal_payloads(e) for e in backend.history] == [[1], [2]]
+    assert backend.inbox == []
+
+
+def test_signals_marked_but_not_recorded_are_drained_again():
+    async def main():
+        backend = MemorySignalBackend()
+        await Client(backend).signal("wf", "n", 1)
+        runner = make_runner(backend)
+        runner_workflow = make_runner_workflow()
+
+        backend.fail_history = True
+        with pytest.raises(RuntimeError):
+            await runner._drain_signals(runner_workflow)
+
+        backend.fail_history = False
+        drained = await runner._drain_signals(runner_workflow)
+        return backend, drained
+
+    backend, drained = asyncio.run(main())
+    assert [s.payload for s in drained] == [1]
+    assert [signal_payloads(e) for e in backend.history] == [[1]]
+
+
+def test_signal_buffer_coalesces_unreceived_signals():
+    buffer = SignalBuffer()
+    for i in range(100):
+        buffer.extend(
+            [WorkflowSignal(workflow_id="wf", name="progress", payload=i, coalesce=True)]
+        )
+    buffer.extend([WorkflowSignal(workflow_id="wf", name="done", payload=True)])
+
+    assert len(buffer) == 2
+    assert [s.payload for s in buffer.take("progress")] == [99]
+    assert [s.name for s in buffer.take()] == ["done"]
+    assert len(buffer) == 0
+
+
+def test_workflow_receives_signals():
+    async def main():
+        buffer = SignalBuffer()
+        _workflow_execution_context.set({"signals": buffer})
+        waiter = asyncio.create_task(wait_for_signal("approve"))
+        await asyncio.sleep(0)
+
+        buffer.extend(
+            [
+                WorkflowSignal(workflow_id="wf", name="progress", payload=1),
+                WorkflowSignal(workflow_id="wf", name="approve", payload="yes"),
+            ]
+        )
+        approved = await waiter
+        return approved, receive_signals()
+
+    approved, rest = asyncio.run(main())
+    assert approved.payload == "yes"
+    assert [s.payload for s in rest] == [1]
+
+
+def test_receive_signals_outside_workflow():
+    with pytest.raises(RuntimeError):
+        receive_signals()
+
+
+def test_wakeup_claims_idle_workflow_and_drains():
+    async def main():
+        backend = MemorySignalBackend()
+        backend.instances["wf"] = make_instance("wf")
+        runner = make_runner(backend)
+        wakeups = asyncio.create_task(runner._wakeups_loop())
+
+        await Client(backend).signal("wf", "n", 1)
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        runner_workflow = runner._workflows.get("wf")
+        wakeups.cancel()
+        if runner_workflow is not None:
+            runner_workflow.task.cancel()
+        return backend, runner_workflow
+
+    backend, runner_workflow = asyncio.run(main())
+    assert runner_workflow is not None
+    assert [s.payload for s in runner_workflow.signals.take()] == [1]
+    assert [e.type for e in backend.history] == [WorkflowEventType.SIGNAL_RECEIVED]
+
+
+def test_wakeup_pokes_held_workflow():
+    async def main():
+        backend = MemorySignalBackend()
+        runner = make_runner(backend)
+        runner_workflow = make_runner_workflow()
+        runner._workflows["wf"] = runner_workflow
+        await runner._wakeup_workflow("wf")
+        return backend, runner_workflow
+
+    backend, runner_workflow = asyncio.run(main())
+    assert runner_workflow.wakeup.is_set()
+    assert backend.locks == {}
+
+
+@pytest.mark.parametrize(
+    "instance",
+    [
+        make_instance("wf", status=WorkflowStatus.TERMINATED),
+        make_instance("wf", queue="queue2"),
+    ],
+)
+def test_wakeup_ignores_closed_or_foreign_workflows(instance):
+    async def main():
+        backend = MemorySignalBackend()
+        backend.instances["wf"] = instance
+        runner = make_runner(backend)
+        await runner._wakeup_workflow("wf")
+        return backend, runner
+
+    backend, runner = asyncio.run(main())
+    assert runner._workflows == {}
+    assert backend.locks == {}
+
+
+def test_wakeup_stream_restarts_after_failure():
+    class FlakyBackend(MemorySignalBackend):
+        streams = 0
+
+        async def iter_workflow_wakeups(self, queue):
+            self.streams += 1
+            if self.streams == 1:
+                raise RuntimeError("stream failed")
+            yield "wf"
+
+    async def main():
+        backend = FlakyBackend()
+        runner = make_runner(backend, pending_workflows_poll_sec=0)
+        runner_workflow = make_runner_workflow()
+        runner._workflows["wf"] = runner_workflow
+        await runner._wakeups_loop()
+        return backend, runner_workflow
+
+    backend, runner_workflow = asyncio.run(main())
+    assert backend.streams == 2
+    assert runner_workflow.wakeup.is_set()